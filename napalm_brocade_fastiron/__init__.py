@@ -13,4 +13,4 @@
 # the License.
 
 """napalm-fastiron package."""
-from brocade_fastiron import BrocadeFastironDriver
+from napalm_brocade_fastiron.brocade_fastiron import BrocadeFastironDriver
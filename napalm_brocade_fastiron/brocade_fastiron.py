@@ -16,6 +16,8 @@
 Napalm driver for Brocade Fastiron.
 """
 
+from builtins import str
+
 from netmiko import ConnectHandler
 from netmiko import __version__ as netmiko_version
 from napalm_base.base import NetworkDriver
@@ -26,11 +28,64 @@ from napalm_base.exceptions import (
     ReplaceConfigException,
     CommandErrorException,
     )
-import napalm_base.helpers
-from netaddr import IPNetwork
+from napalm_brocade_fastiron.utils import parsers
+from multiprocessing.pool import ThreadPool
 import re
 
 
+_RE_DURATION = re.compile(r'(?:(?P<d>\d+) days)?\s*(?:(?P<h>\d+) hours)?\s*'
+                          r'(?:(?P<m>\d+) minutes)?\s*(?:(?P<s>\d+) seconds)?')
+
+_RE_MGMT = re.compile(r'mgmt(\d+)')
+_RE_PORT = re.compile(r'(\d+/\d+)')
+_RE_VELB = re.compile(r'(ve|lb|mgmt)\d+')
+
+_RE_IF_HDR = re.compile(r'^(\S+?)(\d+(?:/\d+)*) is ', re.MULTILINE)
+_RE_PORT_FLAP = re.compile(r'Port \S+ for (\d.*seconds)')
+_RE_PORT_NAME = re.compile(r'\sPort name is (.*)', re.MULTILINE)
+_RE_CONF_SPEED = re.compile(r'\sConfigured speed (\S+), actual (\S+),')
+_RE_SPEED = re.compile(r'(\d+)\s*([MG])')
+
+# One match per table row, header lines never match
+_RE_IFBRIEF = re.compile(r'^((?:\d|ve|lb|mgmt)\S*)[ \t]+(\S+)[ \t]+(\S+)(?:[ \t]+\S+){6}'
+                         r'[ \t]+(\S+)', re.MULTILINE)
+
+_RE_STATS_PORT = re.compile(r'^(\d+/\S+|mgmt\d+)[ \t]+\d+', re.MULTILINE)
+
+
+def _netmiko_argument_keys():
+    """Returns the optional arguments supported by the installed Netmiko."""
+    # Netmiko possible arguments
+    keys = (
+        'port',
+        'secret',
+        'verbose',
+        'global_delay_factor',
+        'use_keys',
+        'key_file',
+        'ssh_strict',
+        'system_host_keys',
+        'alt_host_keys',
+        'alt_key_file',
+        'ssh_config_file',
+    )
+
+    # Only the leading digits of each part count, so pre-release tags like
+    # '2.0.0a1' don't break the import
+    fields = [int(x) for x in re.findall(r'^\d+|(?<=\.)\d+', netmiko_version)[:2]]
+    maj_ver, min_ver = (fields + [0, 0])[:2]
+    if maj_ver >= 2:
+        keys += ('allow_agent',)
+    elif maj_ver == 1 and min_ver >= 1:
+        keys += ('allow_agent',)
+
+    return keys
+
+
+# Computed once at import, the Netmiko version can't change afterwards
+_NETMIKO_ARG_KEYS = _netmiko_argument_keys()
+
+
 class BrocadeFastironDriver(NetworkDriver):
     """Napalm driver for Brocade Fastiron."""
 
@@ -46,56 +101,55 @@ class BrocadeFastironDriver(NetworkDriver):
         self.device = None
         self._os_version = None
         self._merge_cfg = None
-
-        # Netmiko possible arguments
-        netmiko_argument_map = {
-            'port': None,
-            'secret': '',
-            'verbose': False,
-            'global_delay_factor': 1,
-            'use_keys': False,
-            'key_file': None,
-            'ssh_strict': False,
-            'system_host_keys': False,
-            'alt_host_keys': False,
-            'alt_key_file': '',
-            'ssh_config_file': None,
-        }
-
-        fields = netmiko_version.split('.')
-        fields = [int(x) for x in fields]
-        maj_ver, min_ver, bug_fix = fields
-        if maj_ver >= 2:
-            netmiko_argument_map['allow_agent'] = False
-        elif maj_ver == 1 and min_ver >= 1:
-            netmiko_argument_map['allow_agent'] = False
+        self._cmd_cache = {}
+        self._pool = []
+        self._running_cache = None
+        # Replaced by _get_os_version once the device has been queried
+        self._parse_port_flap = self._parse_port_flap_v7
 
         # Build dict of any optional Netmiko args
-        self.netmiko_optional_args = {}
-        for k, v in netmiko_argument_map.items():
-            try:
-                self.netmiko_optional_args[k] = optional_args[k]
-            except KeyError:
-                pass
+        self.netmiko_optional_args = {k: optional_args[k] for k in _NETMIKO_ARG_KEYS
+                                      if k in optional_args}
         self.global_delay_factor = optional_args.get('global_delay_factor', 1)
         self.port = optional_args.get('port', 22)
+        # Number of SSH sessions used to fetch per-port details concurrently
+        self.parallel_channels = int(optional_args.get('parallel_channels', 1))
+        # Reuse the running-config between getters until the next commit
+        self.cache_running = optional_args.get('cache_running', False)
+
 
+    def _connect(self):
+        session = ConnectHandler(device_type='brocade_fastiron',
+                                 host=self.hostname,
+                                 username=self.username,
+                                 password=self.password,
+                                 **self.netmiko_optional_args)
+        session.enable()
+        return session
 
     def open(self):
         """Implementation of NAPALM method open."""
-        self.device = ConnectHandler(device_type='brocade_fastiron',
-                                     host=self.hostname,
-                                     username=self.username,
-                                     password=self.password,
-                                     **self.netmiko_optional_args)
-        self.device.enable()
+        self.device = self._connect()
         self._get_os_version()
 
     def close(self):
         """Implementation of NAPALM method close."""
 
+        for session in self._pool:
+            session.disconnect()
+        self._pool = []
+        self._running_cache = None
         self.device.disconnect()
 
+    def _get_sessions(self):
+        """
+        Returns the main session plus the extra sessions for parallel_channels,
+        opening the extra sessions on first use.
+        """
+        while len(self._pool) < self.parallel_channels - 1:
+            self._pool.append(self._connect())
+        return [self.device] + self._pool
+
     def _get_os_version(self):
         """
         Sets the local os_version variable because some commands and output
@@ -105,18 +159,33 @@ class BrocadeFastironDriver(NetworkDriver):
         output = self._send_command(cmd)
         self._os_version = int(output.splitlines()[0].split()[2].split('.')[0])
 
+        # Pick the version specific parsers once instead of on every port
+        if self._os_version == 8:
+            self._parse_port_flap = self._parse_port_flap_v8
+        else:
+            self._parse_port_flap = self._parse_port_flap_v7
+
     def _send_command(self, command):
         """
         Wrapper for self.device.send.command().
         If command is a list will iterate through commands until valid command.
+        The valid command is remembered so later calls only send that one.
         """
+        return self._send_command_on(self.device, command)
+
+    def _send_command_on(self, session, command):
+        """Same as _send_command but on the given netmiko session."""
         if isinstance(command, list):
+            key = tuple(command)
+            if key in self._cmd_cache:
+                return session.send_command(self._cmd_cache[key])
             for cmd in command:
-                output = self.device.send_command(cmd)
+                output = session.send_command(cmd)
                 if 'Invalid input' not in output:
+                    self._cmd_cache[key] = cmd
                     break
         else:
-            output = self.device.send_command(command)
+            output = session.send_command(command)
         return output
 
     def _write_memory(self):
@@ -160,117 +229,96 @@ class BrocadeFastironDriver(NetworkDriver):
             configs['startup'] = self._send_command(command)
         return configs
 
+    def _fetch_running(self):
+        """Returns the running-config, from the cache when cache_running is set."""
+        if self.cache_running and self._running_cache is not None:
+            return self._running_cache
+
+        running = self._send_command('show running-config')
+        if self.cache_running:
+            self._running_cache = running
+        return running
+
     def load_merge_candidate(self, filename=None, config=None):
         if filename and config:
             raise ValueError("Cannot simultaneously set filename and config")
 
         if filename:
+            # Build the list while the file is still open, a lazy filter()
+            # would be read after the file is closed on Python 3
             with open(filename, 'r') as fobj:
-                self._merge_cfg = filter(None, (l.strip() for l in fobj))
+                self._merge_cfg = [s for s in (l.strip() for l in fobj) if s]
 
         if config:
             if isinstance(config, list):
-                self._merge_cfg = filter(None, (l.strip() for l in config))
+                self._merge_cfg = [s for s in (l.strip() for l in config) if s]
             else:
-                self._merge_cfg = filter(None,
-                                       (l.strip() for l in config.splitlines()))
+                self._merge_cfg = [s for s in (l.strip() for l in config.splitlines()) if s]
 
     def commit_config(self):
         output = self.device.send_config_set(self._merge_cfg)
         self._send_command('write memory')
+        self._running_cache = None
         return output
 
     def get_arp_table(self):
         """Get arp table information."""
-        arp_table = list()
         cmd = 'show arp'
-        output = self._send_command(cmd).splitlines()
-
-        # Skip over the heacder
-        if self._os_version == 7:
-            output = output[2:]
-        if self._os_version == 8:
-            output = output[3:]
-
-        for line in output:
-            fields = line.split()
-            if len(fields) == 7:
-                num, address, mac, typ, age, interface, state = fields
-
-                try:
-                    age = float(age)
-                except ValueError:
-                    raise ValueError("Unable to convert age value to float: {}".format(age))
-
-                if 'None' in mac:
-                    mac = napalm_base.helpers.mac("00:00:00:00:00:00")
-                else:
-                    mac = napalm_base.helpers.mac(mac)
-
-                entry = {
-                    'interface': interface,
-                    'mac': mac,
-                    'ip': address,
-                    'age': age
-                }
-
-                arp_table.append(entry)
-
-        return arp_table
+        output = self._send_command(cmd)
+        return parsers.parse_arp_table(output)
 
     def _parse_port_change(self, string):
         # 632 days 18 hours 20 minutes 40 seconds
         # 3 days 36 minutes 18 seconds
         # 1 seconds
-        days, hours, mins, secs = [0,0,0,0]
-        re_d = re.search('(\d+) days', string)
-        re_h = re.search('(\d+) hours', string)
-        re_m = re.search('(\d+) minutes', string)
-        re_s = re.search('(\d+) seconds', string)
-
-        if re_d:
-            days = int(re_d.group(1))
-        if re_h:
-            hours = int(re_h.group(1))
-        if re_m:
-            mins = int(re_m.group(1))
-        if re_s:
-            secs = int(re_s.group(1))
+        re_t = _RE_DURATION.match(string)
+        days = int(re_t.group('d') or 0)
+        hours = int(re_t.group('h') or 0)
+        mins = int(re_t.group('m') or 0)
+        secs = int(re_t.group('s') or 0)
 
         t = secs + (mins*60) + (hours*60*60) + (days*24*60*60)
         if t == 0:
             return -1
         return t
 
+    def _parse_port_flap_v7(self, output):
+        # Version 7 doesn't report how long the port has been up or down
+        return -1
+
+    def _parse_port_flap_v8(self, output):
+        last_flap = _RE_PORT_FLAP.search(output).group(1)
+        return self._parse_port_change(last_flap)
+
     def _calc_speed(self, speed):
-        unit = speed[-4]
-        if unit == 'M':
-            s = int(speed[:-4])
-        else:
-            s = int(speed[:-4]) * 1000
+        # 100Mbit, 1Gbit, 10Gbps, ... in Mbit/s
+        re_speed = _RE_SPEED.match(speed)
+        if not re_speed:
+            raise ValueError("Unable to parse port speed: {}".format(speed))
+        s = int(re_speed.group(1))
+        if re_speed.group(2) == 'G':
+            s = s * 1000
         return s
 
     def _get_interface_details(self, port):
-        re_mgmt = re.match('mgmt(\d+)', port)
+        re_mgmt = _RE_MGMT.match(port)
         if re_mgmt:
             cmd = 'show interface management {}'.format(re_mgmt.group(1))
         else:
             cmd = 'show interface ethernet {}'.format(port)
         output = self._send_command(cmd)
+        return self._parse_interface_details(output)
 
-        last_flap = -1
+    def _parse_interface_details(self, output):
+        last_flap = self._parse_port_flap(output)
         description = ''
         speed = 1000
 
-        if self._os_version == 8:
-            last_flap = re.search(r'Port \S+ for (\d.*seconds)', output).group(1)
-            last_flap = self._parse_port_change(last_flap)
-
-        re_desc = re.search(r'\sPort name is (.*)', output, re.MULTILINE)
+        re_desc = _RE_PORT_NAME.search(output)
         if re_desc:
             description = re_desc.group(1)
 
-        re_speed = re.search('\sConfigured speed (\S+), actual (\S+),', output)
+        re_speed = _RE_CONF_SPEED.search(output)
         if 'unknown' not in re_speed.group(2):
             speed = self._calc_speed(re_speed.group(2))
         elif 'auto' not in re_speed.group(1):
@@ -282,48 +330,74 @@ class BrocadeFastironDriver(NetworkDriver):
         port = port.replace('lb', 'loopback')
         cmd = 'show interface {}'.format(port)
         output = self._send_command(cmd)
+        return self._parse_logical_interface_detail(output)
 
+    def _parse_logical_interface_detail(self, output):
         speed = -1
         last_flap = -1
         description = ''
 
-        re_desc = re.search(r'\sPort name is (.*)', output, re.MULTILINE)
+        re_desc = _RE_PORT_NAME.search(output)
         if re_desc:
             description = re_desc.group(1)
 
         return [last_flap, description, speed]
 
+    def _get_interface_blocks(self):
+        """
+        Splits a single 'show interface' into the raw block of each interface,
+        keyed the way 'sh interfaces brief' names the port. The blocks are only
+        parsed for the ports get_interfaces actually reports.
+        """
+        blocks = dict()
+        output = self._send_command('show interface')
+
+        # Split into [preamble, name, number, block, name, number, block, ...]
+        fields = _RE_IF_HDR.split(output)
+        for name, num, block in zip(fields[1::3], fields[2::3], fields[3::3]):
+            name = name.lower()
+            if 'ethernet' in name:
+                blocks[num] = block
+            elif name == 'management':
+                blocks['mgmt' + num] = block
+            elif name == 've':
+                blocks['ve' + num] = block
+            elif name == 'loopback':
+                blocks['lb' + num] = block
+
+        return blocks
+
     def get_interfaces(self):
         """Get interface details."""
         interface_list = dict()
+        blocks = self._get_interface_blocks()
 
         cmd = 'sh interfaces brief'
-        output = self._send_command(cmd).splitlines()
-
-        for line in output:
-            fields = line.split()
-
-            if len(fields) == 0:
-                continue
-            if fields[0] == 'Port':
-                continue
+        output = self._send_command(cmd)
 
-            port, link, state = fields[:3]
-            speed = fields[4]
-            mac = fields[9]
+        for re_if in _RE_IFBRIEF.finditer(output):
+            port, link, state, mac = re_if.groups()
 
             if 'N/A' not in mac:
-                mac = napalm_base.helpers.mac(mac)
+                mac = parsers.normalize_mac(mac)
 
-            if re.match('(\d+/\d+)', port):
+            if _RE_PORT.match(port):
                 is_up = bool('forward' in state.lower())
                 is_enabled = not bool('disable' in link.lower())
-                port_details = self._get_interface_details(port)
-            elif re.match('(ve|lb|mgmt)\d+', port):
+                if port in blocks:
+                    port_details = self._parse_interface_details(blocks[port])
+                else:
+                    port_details = self._get_interface_details(port)
+            elif _RE_VELB.match(port):
                 is_enabled = not bool('down' in link.lower())
                 is_up = is_enabled
                 if 'mgmt' in port:
-                    port_details = self._get_interface_details(port)
+                    if port in blocks:
+                        port_details = self._parse_interface_details(blocks[port])
+                    else:
+                        port_details = self._get_interface_details(port)
+                elif port in blocks:
+                    port_details = self._parse_logical_interface_detail(blocks[port])
                 else:
                     port_details = self._get_logical_interface_detail(port)
             else:
@@ -332,7 +406,7 @@ class BrocadeFastironDriver(NetworkDriver):
             interface_list[port] = {
                 'is_up': is_up,
                 'is_enabled': is_enabled,
-                'description': unicode(port_details[1]),
+                'description': str(port_details[1]),
                 'last_flapped': float(port_details[0]),
                 'speed': port_details[2],
                 'mac_address': mac
@@ -340,142 +414,51 @@ class BrocadeFastironDriver(NetworkDriver):
 
         return interface_list
 
-    def _get_detailed_counters(self, port):
-        counters = dict()
-        re_mgmt = re.match('mgmt(\d+)', port)
+    def _get_detailed_counters(self, port, session=None):
+        re_mgmt = _RE_MGMT.match(port)
         if re_mgmt:
             cmd = 'show statistics management {}'.format(re_mgmt.group(1))
         else:
             cmd = 'show statistics ethernet {}'.format(port)
 
-        output = self._send_command(cmd)
-
-        octets = re.search(r'InOctets\s+(\d+)\s+OutOctets\s+(\d+)', output)
-        if octets:
-            counters['rx_octets'] = octets.group(1)
-            counters['tx_octets'] = octets.group(2)
-
-        packets = re.search(r'InUnicastPkts\s+(\d+)\s+OutUnicastPkts\s+(\d+)',
-                            output)
-        if packets:
-            counters['rx_unicast_packets'] = packets.group(1)
-            counters['rx_unicast_packets'] = packets.group(2)
-
-        multicast = re.search(r'InMulticastPkts\s+(\d+)\s+OutMulticastPkts\s+(\d+)',
-                              output)
-        if multicast:
-            counters['rx_multicast_packets'] = multicast.group(1)
-            counters['tx_multicast_packets'] = multicast.group(2)
-
-        broadcast = re.search(r'InBroadcastPkts\s+(\d+)\s+OutBroadcastPkts\s+(\d+)',
-                              output)
-        if broadcast:
-            counters['rx_broadcast_packets'] = broadcast.group(1)
-            counters['tx_broadcast_packets'] = broadcast.group(2)
-
-        discards = re.search(r'InDiscards\s+(\d+)', output)
-        if discards:
-            counters['rx_discards'] = discards.group(1)
-
-        out_errors = re.search(r'OutErrors\s+(\d+)', output)
-        if out_errors:
-            counters['tx_errors'] = out_errors.group(1)
-
-        in_errors = re.search(r'InErrors\s+(\d+)', output)
-        if in_errors:
-            counters['rx_errors'] = in_errors.group(1)
-
-        return counters
+        output = self._send_command_on(session or self.device, cmd)
+        return parsers.parse_counters(output)
 
     def get_interfaces_counters(self):
         counters = dict()
         cmd = 'show statistics'
-        output = self._send_command(cmd).splitlines()
-        output = output[2:-1]
+        output = self._send_command(cmd)
 
-        ports = list()
-        for line in output:
-            fields = line.split()
-            ports.append(fields[0])
+        ports = _RE_STATS_PORT.findall(output)
 
-        for port in ports:
-            counters[port] = self._get_detailed_counters(port)
+        if self.parallel_channels > 1 and len(ports) > 1:
+            sessions = self._get_sessions()
+            # Each session gets its own slice of ports so no two threads
+            # ever share a session
+            chunks = [(session, ports[i::len(sessions)])
+                      for i, session in enumerate(sessions)]
+            pool = ThreadPool(len(sessions))
+            try:
+                for chunk in pool.map(self._get_counters_on, chunks):
+                    counters.update(chunk)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for port in ports:
+                counters[port] = self._get_detailed_counters(port)
 
         return counters
 
+    def _get_counters_on(self, chunk):
+        session, ports = chunk
+        return [(port, self._get_detailed_counters(port, session)) for port in ports]
+
     def get_mac_address_table(self):
-        mac_address_table = list()
         cmd = 'show mac-address'
-        output = self._send_command(cmd).splitlines()
-        output = output[2:]
-
-        for line in output:
-            fields = line.split()
-            if len(fields) == 5 and 'MAC-Address' not in fields[0]:
-                mac, port, mtype, index, vlan = fields
-                is_static = not bool('Dynamic' in mtype)
-                mac = napalm_base.helpers.mac(mac)
-
-                entry = {
-                    'mac': mac,
-                    'interface': unicode(port),
-                    'vlan': int(vlan),
-                    'active': True,
-                    'static': is_static,
-                    'moves': -1,
-                    'last_move': float(-1)
-                }
-
-                mac_address_table.append(entry)
-
-        return mac_address_table
+        output = self._send_command(cmd)
+        return parsers.parse_mac_address_table(output)
 
     def get_interfaces_ip(self):
-        interfaces = dict()
-        config = self.get_config(retrieve='running')['running'].splitlines()
-
-        for line in config:
-            re_int = re.match('interface\s(\S+)\s(\S+)', line)
-            if re_int:
-                if_block = True
-                port = "{}{}".format(re_int.group(1),re_int.group(2))
-                port = port.replace('ethernet', '')
-                port = port.replace('loopback', 'lb')
-                port = port.replace('management', 'mgmt')
-                port = port.replace('ve', 'v')
-                continue
-
-            re_ip = re.search('^\s(ip|ipv6) address (.*)', line)
-            if re_ip:
-                ip = re_ip.group(2)
-                ip = ip.replace(' dynamic', '')
-                ip = ip.replace(' ', '/')
-                ip = IPNetwork(ip)
-                ver = "ipv{}".format(ip.version)
-
-                if port not in interfaces:
-                    interfaces[port] = dict()
-                if ver not in interfaces[port]:
-                    interfaces[port][ver] = dict()
-
-                interfaces[port][ver][str(ip.ip)] = {'prefix_length': ip.prefixlen}
-
-        return interfaces
-
-    def get_lldp_neighbors(self):
-        pass
-
-    def get_lldp_neighbors_detail(self, interface=''):
-        pass
-
-    def get_environment(self):
-        pass
-
-    def get_ntp_servers(self):
-        pass
-
-    def get_ntp_stats(self):
-        pass
-
-    def get_route_to(self, destination='', protocol=''):
-        pass
+        config = self._fetch_running()
+        return parsers.parse_interfaces_ip(config)
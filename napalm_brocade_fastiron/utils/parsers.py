@@ -0,0 +1,212 @@
+# Copyright 2016 Dravetech AB. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Parsers for Brocade Fastiron command output.
+
+These are plain functions over strings with no device access, so this module
+can be compiled with mypyc (see setup.py). The type comments keep it valid on
+Python 2 as well.
+"""
+
+from builtins import str
+
+import napalm_base.helpers
+from ipaddress import ip_interface
+import re
+
+MYPY = False
+if MYPY:
+    from typing import Any, Callable, Dict, List  # noqa
+
+
+# 'show statistics ethernet' counter name -> napalm counter
+_COUNTER_MAP = {
+    'InOctets': 'rx_octets',
+    'OutOctets': 'tx_octets',
+    'InUnicastPkts': 'rx_unicast_packets',
+    'OutUnicastPkts': 'tx_unicast_packets',
+    'InMulticastPkts': 'rx_multicast_packets',
+    'OutMulticastPkts': 'tx_multicast_packets',
+    'InBroadcastPkts': 'rx_broadcast_packets',
+    'OutBroadcastPkts': 'tx_broadcast_packets',
+    'InDiscards': 'rx_discards',
+    'OutErrors': 'tx_errors',
+    'InErrors': 'rx_errors',
+}
+_RE_COUNTERS = re.compile(r'\b({})\s+(\d+)'.format('|'.join(_COUNTER_MAP)))
+# FastIron has no OutDiscards counter
+_COUNTER_NAMES = sorted(_COUNTER_MAP.values()) + ['tx_discards']
+
+# One match per table row, header and summary lines never match.
+# The mac-address table may or may not have an Index column.
+_RE_ARP = re.compile(r'^[ \t]*\d+[ \t]+(\S+)[ \t]+(\S+)[ \t]+\S+[ \t]+(\S+)[ \t]+(\S+)'
+                     r'[ \t]+\S+[ \t]*$', re.MULTILINE)
+_RE_MAC = re.compile(r'^[ \t]*([0-9a-fA-F]{4}\.[0-9a-fA-F]{4}\.[0-9a-fA-F]{4})[ \t]+(\S+)'
+                     r'[ \t]+(\S+)[ \t]+(?:\S+[ \t]+)?(\d+)[ \t]*$', re.MULTILINE)
+
+_RE_BROCADE_MAC = re.compile(r'^[0-9a-fA-F]{4}\.[0-9a-fA-F]{4}\.[0-9a-fA-F]{4}$')
+
+# Matches either an interface header or an indented ip/ipv6 address line
+_RE_CFG_IP = re.compile(r'^(?:interface[ \t](\S+)[ \t](\S+)|[ \t](ip|ipv6) address (.*))',
+                        re.MULTILINE)
+
+# Running-config interface type -> short port prefix, replaced in one pass
+_PORT_MAP = {
+    'ethernet': '',
+    'loopback': 'lb',
+    'management': 'mgmt',
+    've': 'v',
+}
+_RE_PORTSUB = re.compile(r'ethernet|loopback|management|ve')
+
+
+_MISSING = object()
+
+
+def _memoize(func, maxsize=65536):
+    # type: (Callable[[str], Any], int) -> Callable[[str], Any]
+    """Bounded cache for single argument helpers, functools.lru_cache is Python 3 only."""
+    cache = {}  # type: Dict[str, Any]
+
+    def wrapper(arg):
+        # type: (str) -> Any
+        # Misses are common (every new MAC), so avoid raising KeyError for them
+        result = cache.get(arg, _MISSING)
+        if result is _MISSING:
+            if len(cache) >= maxsize:
+                cache.clear()
+            cache[arg] = result = func(arg)
+        return result
+    return wrapper
+
+
+def _fast_mac(mac):
+    # type: (str) -> str
+    """
+    Converts the Brocade xxxx.xxxx.xxxx format straight to the XX:XX:XX:XX:XX:XX
+    format of napalm_base.helpers.mac, anything else goes through the helper.
+    """
+    if not _RE_BROCADE_MAC.match(mac):
+        return napalm_base.helpers.mac(mac)
+    return u'{}:{}:{}:{}:{}:{}'.format(mac[0:2], mac[2:4], mac[5:7],
+                                       mac[7:9], mac[10:12], mac[12:14]).upper()
+
+
+# The same MACs show up in the arp, mac-address and interface tables
+normalize_mac = _memoize(_fast_mac)
+# Many interfaces share the same addresses and prefixes
+_ip_interface_cached = _memoize(lambda ip: ip_interface(str(ip)))
+
+NULL_MAC = normalize_mac('00:00:00:00:00:00')
+
+
+def parse_arp_table(output):
+    # type: (str) -> List[Dict[str, Any]]
+    """Parses 'show arp'."""
+    arp_table = list()
+
+    for re_arp in _RE_ARP.finditer(output):
+        address, mac, age, interface = re_arp.groups()
+
+        try:
+            age_secs = float(age)
+        except ValueError:
+            raise ValueError("Unable to convert age value to float: {}".format(age))
+
+        if 'None' in mac:
+            mac = NULL_MAC
+        else:
+            mac = normalize_mac(mac)
+
+        entry = {
+            'interface': interface,
+            'mac': mac,
+            'ip': address,
+            'age': age_secs
+        }  # type: Dict[str, Any]
+
+        arp_table.append(entry)
+
+    return arp_table
+
+
+def parse_mac_address_table(output):
+    # type: (str) -> List[Dict[str, Any]]
+    """Parses 'show mac-address'."""
+    mac_address_table = list()
+
+    for re_mac in _RE_MAC.finditer(output):
+        mac, port, mtype, vlan = re_mac.groups()
+        is_static = not bool('Dynamic' in mtype)
+
+        entry = {
+            'mac': normalize_mac(mac),
+            'interface': str(port),
+            'vlan': int(vlan),
+            'active': True,
+            'static': is_static,
+            'moves': -1,
+            'last_move': float(-1)
+        }  # type: Dict[str, Any]
+
+        mac_address_table.append(entry)
+
+    return mac_address_table
+
+
+def parse_counters(output):
+    # type: (str) -> Dict[str, int]
+    """
+    Parses 'show statistics ethernet' or 'show statistics management'.
+    Counters missing from the output are -1.
+    """
+    counters = dict()  # type: Dict[str, int]
+
+    # One pass over the output, the first value seen for a counter wins
+    for name, value in _RE_COUNTERS.findall(output):
+        counters.setdefault(_COUNTER_MAP[name], int(value))
+
+    for name in _COUNTER_NAMES:
+        counters.setdefault(name, -1)
+
+    return counters
+
+
+def parse_interfaces_ip(config):
+    # type: (str) -> Dict[str, Dict[str, Dict[str, Dict[str, int]]]]
+    """Parses the interface addresses out of the running-config."""
+    interfaces = dict()  # type: Dict[str, Dict[str, Dict[str, Dict[str, int]]]]
+    port = ''
+
+    for re_cfg in _RE_CFG_IP.finditer(config):
+        if_type, if_num, _, address = re_cfg.groups()
+        if if_type:
+            port = "{}{}".format(if_type, if_num)
+            port = _RE_PORTSUB.sub(lambda m: _PORT_MAP[m.group(0)], port)
+            continue
+
+        address = address.replace(' dynamic', '')
+        address = address.replace(' ', '/')
+        ip = _ip_interface_cached(address)
+        ver = "ipv{}".format(ip.version)
+
+        if port not in interfaces:
+            interfaces[port] = dict()
+        if ver not in interfaces[port]:
+            interfaces[port][ver] = dict()
+
+        interfaces[port][ver][str(ip.ip)] = {'prefix_length': ip.network.prefixlen}
+
+    return interfaces
@@ -1,5 +1,6 @@
 """setup.py file."""
 
+import os
 import uuid
 
 from setuptools import setup, find_packages
@@ -10,6 +11,13 @@ __author__ = 'Matt Baudendistel <mbaudendistel@contegix.com>'
 install_reqs = parse_requirements('requirements.txt', session=uuid.uuid1())
 reqs = [str(ir.req) for ir in install_reqs]
 
+# Set NAPALM_FASTIRON_MYPYC=1 to compile the parsers with mypyc (Python 3 only).
+# The pure Python module is always installed so it still works without a C toolchain.
+ext_modules = []
+if os.environ.get('NAPALM_FASTIRON_MYPYC'):
+    from mypyc.build import mypycify
+    ext_modules = mypycify(['--ignore-missing-imports', 'napalm_brocade_fastiron/utils/parsers.py'])
+
 setup(
     name="napalm-brocade-fastiron",
     version="0.1.0",
@@ -26,4 +34,5 @@ setup(
     url="https://github.com/napalm-automation/napalm-skeleton",
     include_package_data=True,
     install_requires=reqs,
+    ext_modules=ext_modules,
 )
@@ -6,7 +6,7 @@ from napalm_base.test import conftest as parent_conftest
 
 from napalm_base.test.double import BaseTestDouble
 
-from napalm_skeleton import skeleton
+from napalm_brocade_fastiron import brocade_fastiron
 
 
 @pytest.fixture(scope='class')
@@ -16,9 +16,9 @@ def set_device_parameters(request):
         request.cls.device.close()
     request.addfinalizer(fin)
 
-    request.cls.driver = skeleton.SkeletonDriver
-    request.cls.patched_driver = PatchedSkeletonDriver
-    request.cls.vendor = 'skeleton'
+    request.cls.driver = brocade_fastiron.BrocadeFastironDriver
+    request.cls.patched_driver = PatchedBrocadeFastironDriver
+    request.cls.vendor = 'brocade_fastiron'
     parent_conftest.set_device_parameters(request)
 
 
@@ -27,31 +27,81 @@ def pytest_generate_tests(metafunc):
     parent_conftest.pytest_generate_tests(metafunc, __file__)
 
 
-class PatchedSkeletonDriver(skeleton.SkeletonDriver):
-    """Patched Skeleton Driver."""
+@pytest.fixture
+def fake_driver():
+    """Return a factory for drivers whose sessions answer with canned outputs."""
+    def make(outputs, optional_args=None):
+        driver = brocade_fastiron.BrocadeFastironDriver('127.0.0.1', 'vagrant', 'vagrant',
+                                                        optional_args=optional_args)
+        # Extra sessions opened for parallel_channels share the same outputs
+        driver._connect = lambda: FakeBrocadeFastironDevice(outputs)
+        driver.device = driver._connect()
+        return driver
+    return make
+
+
+class PatchedBrocadeFastironDriver(brocade_fastiron.BrocadeFastironDriver):
+    """Patched Brocade Fastiron Driver."""
 
     def __init__(self, hostname, username, password, timeout=60, optional_args=None):
-        """Patched Skeleton Driver constructor."""
+        """Patched Brocade Fastiron Driver constructor."""
         super().__init__(hostname, username, password, timeout, optional_args)
 
         self.patched_attrs = ['device']
-        self.device = FakeSkeletonDevice()
+        self.device = FakeBrocadeFastironDevice()
+
+    def open(self):
+        """Keep the fake device instead of connecting."""
+        pass
+
+
+class FakeTransport(object):
+    """Fake paramiko transport."""
+
+    def is_active(self):
+        """Fake is_active, the session never drops."""
+        return True
+
+
+class FakeChannel(object):
+    """Fake paramiko channel."""
+
+    def __init__(self):
+        """Attach the fake transport."""
+        self.transport = FakeTransport()
+
+
+class FakeBrocadeFastironDevice(BaseTestDouble):
+    """
+    Brocade Fastiron device test double.
 
+    Answers from the `outputs` dict when one is given, otherwise from the mocked_data
+    files of the current test case. Sent commands are recorded in `commands`.
+    """
 
-class FakeSkeletonDevice(BaseTestDouble):
-    """Skeleton device test double."""
+    def __init__(self, outputs=None):
+        """Set up the fake session."""
+        super().__init__()
+        self.outputs = outputs
+        self.commands = []
+        self.connected = True
+        self.remote_conn = FakeChannel()
 
-    def run_commands(self, command_list, encoding='json'):
-        """Fake run_commands."""
-        result = list()
+    def send_command(self, command, **kwargs):
+        """Fake send_command, returns the mocked output for the command."""
+        self.commands.append(command)
+        if self.outputs is not None:
+            return self.outputs.get(command, 'Invalid input -> {}'.format(command))
 
-        for command in command_list:
-            filename = '{}.{}'.format(self.sanitize_text(command), encoding)
-            full_path = self.find_file(filename)
+        filename = '{}.txt'.format(self.sanitize_text(command))
+        full_path = self.find_file(filename)
+        return self.read_txt_file(full_path)
 
-            if encoding == 'json':
-                result.append(self.read_json_file(full_path))
-            else:
-                result.append({'output': self.read_txt_file(full_path)})
+    def send_config_set(self, config_commands, **kwargs):
+        """Fake send_config_set, records the configuration commands."""
+        self.commands.extend(config_commands)
+        return ''
 
-        return result
+    def disconnect(self):
+        """Fake disconnect."""
+        self.connected = False
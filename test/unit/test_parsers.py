@@ -0,0 +1,318 @@
+"""Tests for the command output parsers."""
+
+import os
+
+import napalm_base.helpers
+import pytest
+
+from napalm_brocade_fastiron.utils import parsers
+
+
+ARP_V7 = """\
+Total number of ARP entries: 2
+No.  IP Address       MAC Address    Type     Age  Port   Status
+1    10.20.30.1       0000.5e00.0101 Dynamic  0    1/1    Valid
+2    10.20.30.7       cc4e.24aa.bb07 Dynamic  12   1/24   Valid
+"""
+
+ARP_V8 = """\
+Total number of ARP entries: 3
+Entries in default routing instance:
+No.  IP Address       MAC Address     Type     Age  Port        Status
+1    10.20.30.1       0000.5e00.0101  Dynamic  2    1/1/48      Valid
+2    10.20.30.5       None            Dynamic  0    1/1/2       Pend
+3    10.99.0.10       cc4e.24aa.bb01  Dynamic  5    mgmt1       Valid
+"""
+
+MAC_V7 = """\
+Total active entries from all ports = 2
+MAC-Address     Port           Type          VLAN
+0000.5e00.0101  1/1            Dynamic       10
+cc4e.24aa.bb01  1/24           Static        20
+"""
+
+MAC_V8 = """\
+Total active entries from all ports = 2
+Total static entries from all ports = 1
+MAC-Address     Port           Type         Index  VLAN
+0000.5e00.0101  1/1/1          Dynamic      1234   10
+cc4e.24aa.bb01  1/1/2          Static       5678   20
+"""
+
+STATISTICS_V8 = """\
+Port 1/1/1 Counters:
+  InOctets            123456789       OutOctets            987654321
+  InPkts              1000            OutPkts              2000
+  InBroadcastPkts     11              OutBroadcastPkts     12
+  InMulticastPkts     21              OutMulticastPkts     22
+  InUnicastPkts       31              OutUnicastPkts       32
+  InBadPkts           0
+  InFragments         0
+  InDiscards          41
+  CRC                 0               Collisions           0
+  InErrors            51              OutErrors            52
+  InGiantPkts         0
+  InShortPkts         0
+  InJabber            0               OutLateCollisions    0
+"""
+
+# Same counters with the rows in a different order
+STATISTICS_REORDERED = """\
+Port 1/1/1 Counters:
+  InErrors            51              OutErrors            52
+  InUnicastPkts       31              OutUnicastPkts       32
+  InDiscards          41
+  InMulticastPkts     21              OutMulticastPkts     22
+  InOctets            123456789       OutOctets            987654321
+  InBroadcastPkts     11              OutBroadcastPkts     12
+"""
+
+COUNTERS = {
+    'rx_octets': 123456789,
+    'tx_octets': 987654321,
+    'rx_unicast_packets': 31,
+    'tx_unicast_packets': 32,
+    'rx_multicast_packets': 21,
+    'tx_multicast_packets': 22,
+    'rx_broadcast_packets': 11,
+    'tx_broadcast_packets': 12,
+    'rx_discards': 41,
+    'rx_errors': 51,
+    'tx_errors': 52,
+    'tx_discards': -1,
+}
+
+RUNNING_CONFIG = """\
+Current configuration:
+!
+ver 08.0.30dT213
+!
+ip address 10.0.0.254 255.255.255.0
+!
+interface management 1
+ ip address 10.99.0.2 255.255.255.0 dynamic
+!
+interface ethernet 1/1/1
+ port-name uplink
+ ip address 10.20.30.2 255.255.255.0
+ ipv6 address 2001:db8::2/64
+!
+interface ethernet 1/1/2
+ port-name unused
+!
+interface ve 10
+ ip address 192.168.10.1 255.255.255.0
+ ip address 192.168.11.1 255.255.255.0
+!
+interface loopback 1
+ ip address 10.255.0.1 255.255.255.255
+!
+end
+"""
+
+
+class TestParsers(object):
+    """Test the parsers against captured FastIron output."""
+
+    def test_parse_arp_table_v7(self):
+        """Header and total lines are skipped on FastIron 7."""
+        assert parsers.parse_arp_table(ARP_V7) == [
+            {'interface': '1/1', 'mac': '00:00:5E:00:01:01', 'ip': '10.20.30.1', 'age': 0.0},
+            {'interface': '1/24', 'mac': 'CC:4E:24:AA:BB:07', 'ip': '10.20.30.7', 'age': 12.0},
+        ]
+
+    def test_parse_arp_table_v8(self):
+        """Unresolved entries with a None MAC get the all zero MAC."""
+        assert parsers.parse_arp_table(ARP_V8) == [
+            {'interface': '1/1/48', 'mac': '00:00:5E:00:01:01', 'ip': '10.20.30.1', 'age': 2.0},
+            {'interface': '1/1/2', 'mac': '00:00:00:00:00:00', 'ip': '10.20.30.5', 'age': 0.0},
+            {'interface': 'mgmt1', 'mac': 'CC:4E:24:AA:BB:01', 'ip': '10.99.0.10', 'age': 5.0},
+        ]
+
+    def test_parse_mac_address_table(self):
+        """The table parses with and without the Index column."""
+        for output, ports in ((MAC_V7, ('1/1', '1/24')), (MAC_V8, ('1/1/1', '1/1/2'))):
+            assert parsers.parse_mac_address_table(output) == [
+                {'mac': '00:00:5E:00:01:01', 'interface': ports[0], 'vlan': 10,
+                 'active': True, 'static': False, 'moves': -1, 'last_move': -1.0},
+                {'mac': 'CC:4E:24:AA:BB:01', 'interface': ports[1], 'vlan': 20,
+                 'active': True, 'static': True, 'moves': -1, 'last_move': -1.0},
+            ]
+
+    def test_parse_counters(self):
+        """Both rx and tx unicast counters are set."""
+        counters = parsers.parse_counters(STATISTICS_V8)
+        assert counters == COUNTERS
+        assert counters['tx_unicast_packets'] == 32
+
+    def test_parse_counters_reordered(self):
+        """The counters don't depend on the order of the rows."""
+        assert parsers.parse_counters(STATISTICS_REORDERED) == COUNTERS
+
+    def test_parse_interfaces_ip(self):
+        """IPv4, IPv6 and dynamic addresses are grouped per interface."""
+        assert parsers.parse_interfaces_ip(RUNNING_CONFIG) == {
+            'mgmt1': {'ipv4': {'10.99.0.2': {'prefix_length': 24}}},
+            '1/1/1': {
+                'ipv4': {'10.20.30.2': {'prefix_length': 24}},
+                'ipv6': {'2001:db8::2': {'prefix_length': 64}},
+            },
+            'v10': {'ipv4': {
+                '192.168.10.1': {'prefix_length': 24},
+                '192.168.11.1': {'prefix_length': 24},
+            }},
+            'lb1': {'ipv4': {'10.255.0.1': {'prefix_length': 32}}},
+        }
+
+    def test_normalize_mac(self):
+        """The fast path returns the same format as napalm_base.helpers.mac."""
+        for mac in ('cc4e.24aa.bb01', 'CC4E.24AA.BB01', '0000.5e00.0101',
+                    '00:00:00:00:00:00', 'cc:4e:24:aa:bb:01'):
+            assert parsers.normalize_mac(mac) == napalm_base.helpers.mac(mac)
+        assert parsers.normalize_mac('cc4e.24aa.bb01') == 'CC:4E:24:AA:BB:01'
+
+    @pytest.mark.skipif(not os.environ.get('NAPALM_FASTIRON_MYPYC'),
+                        reason='parsers are only compiled with NAPALM_FASTIRON_MYPYC=1')
+    def test_parsers_compiled(self):
+        """The mypyc build replaces the pure Python module."""
+        assert not parsers.__file__.endswith('.py')
+
+
+SHOW_INTERFACE_V8 = """\
+GigabitEthernet1/1/1 is up, line protocol is up
+  Port up for 3 days 36 minutes 18 seconds
+  Hardware is GigabitEthernet, address is cc4e.24aa.bb00 (bia cc4e.24aa.bb00)
+  Configured speed auto, actual 1Gbit, configured duplex fdx, actual fdx
+  Port name is uplink
+"""
+
+SHOW_INTERFACE_DUMP = SHOW_INTERFACE_V8 + """\
+10GigabitEthernet1/2/1 is down, line protocol is down
+  Port down for 1 seconds
+  Hardware is 10GigabitEthernet, address is cc4e.24aa.bb10 (bia cc4e.24aa.bb10)
+  Configured speed 10Gbit, actual unknown, configured duplex fdx, actual fdx
+  Port name is backbone
+GigabitEthernet1/1/9 is empty
+management1 is up, line protocol is up
+  Port up for 1 days 1 seconds
+  Hardware is GigabitEthernet, address is cc4e.24aa.bb02 (bia cc4e.24aa.bb02)
+  Configured speed auto, actual 100Mbit, configured duplex fdx, actual fdx
+  Port name is oob
+Ve10 is up, line protocol is up
+  Hardware is Virtual Ethernet, address is cc4e.24aa.bb03 (bia cc4e.24aa.bb03)
+  Port name is servers
+Loopback1 is up, line protocol is up
+  Port name is router-id
+"""
+
+# 1/1/9 is in the dump but not in the brief table
+SHOW_INTERFACES_BRIEF = """
+Port       Link    State   Dupl Speed Trunk Tag Pvid Pri MAC             Name
+1/1/1      Up      Forward Full 1G    None  No  1    0   cc4e.24aa.bb00  uplink
+1/2/1      Disable None    None None  None  No  1    0   cc4e.24aa.bb10  backbone
+mgmt1      Up      None    Full 100M  None  No  None 0   cc4e.24aa.bb02  oob
+ve10       Up      N/A     N/A  N/A   None  N/A N/A  N/A cc4e.24aa.bb03
+lb1        Up      N/A     N/A  N/A   None  N/A N/A  N/A N/A
+"""
+
+
+class TestDriverParsing(object):
+    """Test the parsing helpers of the driver without a real device."""
+
+    def test_port_flap_without_open(self, fake_driver):
+        """Interface details parse before open() has detected the OS version."""
+        driver = fake_driver({})
+        assert driver._parse_interface_details(SHOW_INTERFACE_V8) == [-1, 'uplink', 1000]
+
+    def test_port_flap_v8(self, fake_driver):
+        """FastIron 8 reports how long the port has been up."""
+        driver = fake_driver({
+            'show version | include SW: Version': '  SW: Version 08.0.30dT213 Copyright (c)\n',
+        })
+        driver._get_os_version()
+        assert driver._parse_interface_details(SHOW_INTERFACE_V8) == [261378, 'uplink', 1000]
+
+    def test_interface_blocks(self, fake_driver):
+        """Dump headers map to the port names of 'sh interfaces brief'."""
+        blocks = fake_driver({'show interface': SHOW_INTERFACE_DUMP})._get_interface_blocks()
+        assert sorted(blocks) == ['1/1/1', '1/1/9', '1/2/1', 'lb1', 'mgmt1', 've10']
+        assert 'Port name is backbone' in blocks['1/2/1']
+        assert 'Port name is router-id' in blocks['lb1']
+
+    def test_get_interfaces_from_dump(self, fake_driver):
+        """Only the listed ports are parsed, one command covers them all."""
+        driver = fake_driver({
+            'show version | include SW: Version': '  SW: Version 08.0.30dT213 Copyright (c)\n',
+            'show interface': SHOW_INTERFACE_DUMP,
+            'sh interfaces brief': SHOW_INTERFACES_BRIEF,
+        })
+        driver._get_os_version()
+        assert driver.get_interfaces() == {
+            '1/1/1': {'is_up': True, 'is_enabled': True, 'description': 'uplink',
+                      'last_flapped': 261378.0, 'speed': 1000,
+                      'mac_address': 'CC:4E:24:AA:BB:00'},
+            '1/2/1': {'is_up': False, 'is_enabled': False, 'description': 'backbone',
+                      'last_flapped': 1.0, 'speed': 10000,
+                      'mac_address': 'CC:4E:24:AA:BB:10'},
+            'mgmt1': {'is_up': True, 'is_enabled': True, 'description': 'oob',
+                      'last_flapped': 86401.0, 'speed': 100,
+                      'mac_address': 'CC:4E:24:AA:BB:02'},
+            've10': {'is_up': True, 'is_enabled': True, 'description': 'servers',
+                     'last_flapped': -1.0, 'speed': -1,
+                     'mac_address': 'CC:4E:24:AA:BB:03'},
+            'lb1': {'is_up': True, 'is_enabled': True, 'description': 'router-id',
+                    'last_flapped': -1.0, 'speed': -1, 'mac_address': 'N/A'},
+        }
+
+    def test_calc_speed(self, fake_driver):
+        """Speeds are returned in Mbit/s."""
+        driver = fake_driver({})
+        assert driver._calc_speed('100Mbit') == 100
+        assert driver._calc_speed('1Gbit') == 1000
+        assert driver._calc_speed('10Gbps') == 10000
+
+    def test_calc_speed_invalid(self, fake_driver):
+        """Speeds that aren't a whole number of Mbit/s or Gbit/s are rejected."""
+        driver = fake_driver({})
+        for speed in ('2.5Gbit', 'auto', ''):
+            with pytest.raises(ValueError):
+                driver._calc_speed(speed)
+
+    def test_counters_parallel_channels(self, fake_driver):
+        """Each session fetches only its own slice of the ports."""
+        ports = ['1/1/{}'.format(i) for i in range(1, 8)]
+        outputs = {'show statistics': ''.join('{}  10  20  0  0\n'.format(p) for p in ports)}
+        for port in ports:
+            outputs['show statistics ethernet {}'.format(port)] = STATISTICS_V8
+        driver = fake_driver(outputs, {'parallel_channels': 3})
+
+        counters = driver.get_interfaces_counters()
+        assert sorted(counters) == ports
+        assert all(c == COUNTERS for c in counters.values())
+
+        sessions = [driver.device] + driver._pool
+        assert len(sessions) == 3
+        sent = [c for session in sessions for c in session.commands if c != 'show statistics']
+        assert len(sent) == len(ports)
+        for i, session in enumerate(sessions):
+            assert [c for c in session.commands if c != 'show statistics'] == [
+                'show statistics ethernet {}'.format(port) for port in ports[i::3]]
+
+        driver.close()
+        assert driver._pool == []
+        assert not any(session.connected for session in sessions)
+
+    def test_cache_running(self, fake_driver):
+        """The running-config is fetched once until a commit or close()."""
+        driver = fake_driver({'show running-config': RUNNING_CONFIG, 'write memory': ''},
+                             {'cache_running': True})
+        assert driver.get_interfaces_ip() == driver.get_interfaces_ip()
+        assert driver.device.commands.count('show running-config') == 1
+
+        driver.load_merge_candidate(config='hostname sw1')
+        driver.commit_config()
+        driver.get_interfaces_ip()
+        assert driver.device.commands.count('show running-config') == 2
+
+        driver.close()
+        assert driver._running_cache is None